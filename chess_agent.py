@@ -1,20 +1,105 @@
 import chess
+import chess.polyglot
 import time
+from collections import OrderedDict
 from move_book import MoveBook
 
+# Transposition table bound flags and size cap.
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+TT_MAX_ENTRIES = 1_000_000
+
+# The four central squares rewarded by the central control bonus.
+CENTRAL_BB = chess.BB_D4 | chess.BB_D5 | chess.BB_E4 | chess.BB_E5
+
+# Half-width of the search window centred on the previous iteration's score, in pawns.
+ASPIRATION_WINDOW = 0.5
+
+# The clock is read once every TIME_CHECK_INTERVAL nodes (must be a power of two).
+TIME_CHECK_INTERVAL = 256
+
+# Null-move pruning: depth reduction for the null-move search, and the width of the
+# zero-size window (in pawns) used to test a single bound.
+NULL_MOVE_REDUCTION = 2
+NULL_WINDOW = 0.01
+
+# Late move reductions: quiet moves ordered after the first LMR_MIN_MOVES are searched
+# LMR_REDUCTION plies shallower first, and only re-searched at full depth if they look good.
+LMR_MIN_MOVES = 4
+LMR_REDUCTION = 1
+
+# Killer move slots are indexed by ply from the root.
+MAX_PLY = 64
+
+# Basic material values.
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0
+}
+
+
+def _mvv_lva(board: chess.Board, move: chess.Move) -> int:
+    """Capture ordering score: most valuable victim first, then least valuable attacker."""
+    # En passant captures land on an empty square, the victim is always a pawn.
+    victim = board.piece_at(move.to_square)
+    victim_value = PIECE_VALUES[victim.piece_type] if victim else PIECE_VALUES[chess.PAWN]
+    attacker_value = PIECE_VALUES[board.piece_at(move.from_square).piece_type]
+    return victim_value * 10 - attacker_value
+
+
+def _build_pawn_masks():
+    """
+    Precomputes, for every square and color, the bitboard of squares in front of a pawn
+    on the same and adjacent files (passed pawn test) and on the same file only (open road test).
+    Both tables are indexed as [color][square].
+    """
+    passed = [[0] * 64, [0] * 64]
+    forward = [[0] * 64, [0] * 64]
+    for square in chess.SQUARES:
+        rank = chess.square_rank(square)
+        file = chess.square_file(square)
+        for r in range(8):
+            if r == rank:
+                continue
+            color = chess.WHITE if r > rank else chess.BLACK  # Whose pawn this rank is in front of.
+            for f in range(max(0, file - 1), min(7, file + 1) + 1):
+                bb = chess.BB_SQUARES[chess.square(f, r)]
+                passed[color][square] |= bb
+                if f == file:
+                    forward[color][square] |= bb
+    return passed, forward
+
+
+PASSED_PAWN_MASKS, FORWARD_FILE_MASKS = _build_pawn_masks()
+
+
+def _material_balance(board: chess.Board, color: bool) -> int:
+    """Material difference from ``color``'s point of view, counted with popcounts on the piece bitboards."""
+    balance = 0
+    for piece_type, value in PIECE_VALUES.items():
+        if value:
+            balance += value * (chess.popcount(board.pieces_mask(piece_type, color))
+                                - chess.popcount(board.pieces_mask(piece_type, not color)))
+    return balance
+
 class ChessAgent:
     """
     ChessAgent class provides Advanced chess-playing agent that uses opening books and iterative deepening search with alpha-beta pruning.
-    It obeys time constraints with a 0.1s delay and 10s move limit.
+    It obeys time constraints with a 10s move limit, spending all of it on search.
 
     Attributes
     ----------
     color: Boolean indicating the agent's color (True for white, False for black)
     move_book: Reference to the MoveBook object for opening moves
     test_opening_moves: List of moves from a test opening
-    magnus_moves: List of moves from Magnus Carlsen's games
     opening_moves_played: Counter tracking moves played from the test opening
-    magnus_moves_played: Counter tracking moves played from Magnus' games
+    tt: Transposition table mapping Zobrist hashes to (depth, value, flag, best_move)
+    killers: Two quiet moves per ply that recently caused a cutoff
 
     Methods
     ----------
@@ -24,6 +109,12 @@ class ChessAgent:
         Selects the best move using prioritized strategies
     alpha_beta_search()
         Performs alpha-beta pruning search
+    _quiesce()
+        Extends the search through captures at the horizon
+    _order_moves()
+        Orders moves so that the likeliest cutoffs are searched first
+    _king_escape_count()
+        Counts the squares a king can step to
     evaluate()
         Evaluates board positions
     is_move_legal()
@@ -36,25 +127,24 @@ class ChessAgent:
 
         # Retrieve test opening moves (for the given color) if a test code is provided.
         self.test_opening_moves = move_book.get_opening_moves(test_opening_code, color) if test_opening_code else []
-        self.magnus_moves = move_book.get_magnus_moves(color)
         self.opening_moves_played = 0  # Track moves played from the test opening
-        self.magnus_moves_played = 0   # Track moves played from Magnus’ games
         self.failed_moves_count = 0    # Track consecutive failed moves to avoid repeated errors - added for error handling
+        # Transposition table, kept across moves (and iterative-deepening iterations) for the whole match.
+        self.tt: OrderedDict[int, tuple] = OrderedDict()
+        self.killers: list[list[chess.Move]] = [[None, None] for _ in range(MAX_PLY)]
+        self._node_counter = 0  # Nodes visited in the current iterative-deepening iteration
+        self._time_up = False   # Set once the search has run out of time
 
     def is_move_legal(self, board: chess.Board, move_san: str) -> chess.Move: # Added for error handling
             """Helper method to check if a move in SAN notation is legal and return the Move object"""
             try:
                 move = board.parse_san(move_san)
-                if move in board.legal_moves:
-                    return move
-                return None
+                # parse_san returns a null move for "--" or "0000" instead of raising, so it is checked here.
+                return move if move and board.is_legal(move) else None
             except Exception:
                 return None
 
     def select_move(self, board: chess.Board, time_limit: float = 10.0) -> chess.Move:
-        # Fixed 0.1 second delay.
-        time.sleep(0.1)
-
         # 🔹 Test Mode: Use test opening moves (if provided and valid).
         if self.color == chess.WHITE and self.test_opening_moves:
             if self.opening_moves_played < len(self.test_opening_moves):
@@ -68,26 +158,42 @@ class ChessAgent:
                 except Exception as e:
                     print(f"Error in test opening move: {e}")
 
-        # 🔹 Use Magnus' moves if available.
-        elif self.magnus_moves_played < len(self.magnus_moves):
-            expected_move = self.magnus_moves[self.magnus_moves_played]
-            try:
-                move = board.parse_san(expected_move)
-                if move in board.legal_moves:
-                    print(f"Playing {expected_move} ({self.magnus_moves_played + 1}/{len(self.magnus_moves)})")
-                    self.magnus_moves_played += 1
-                    return move
-            except Exception as e:
-                print(f"Magnus move error: {e}")
+        # 🔹 Use Magnus' moves if he reached this position (hash lookup, survives transpositions).
+        elif self.move_book is not None:
+            move = self.move_book.get_response_to_position(board, self.color)
+            if move is not None:
+                print(f"Playing {board.san(move)} (Magnus' games)")
+                return move
 
         # 🔹 Otherwise, use Alpha-Beta Search with iterative deepening.
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self._time_up = False
         start_time = time.time()
         best_move = None
+        prev_score = None
         depth = 1
-        while time.time() - start_time < time_limit:
-            move, _ = self.alpha_beta_search(board, depth, -float('inf'), float('inf'), self.color, start_time, time_limit)
+        while not self._time_up and time.time() - start_time < time_limit:
+            self._node_counter = 0
+            # Aspiration window: from depth 3 on, search a narrow window around the previous score
+            # and re-search with the failing side opened up if the score falls outside of it.
+            if depth >= 3 and prev_score is not None:
+                alpha, beta = prev_score - ASPIRATION_WINDOW, prev_score + ASPIRATION_WINDOW
+            else:
+                alpha, beta = -float('inf'), float('inf')
+            move, score = self.alpha_beta_search(board, depth, alpha, beta, self.color, start_time, time_limit)
+            if not self._time_up and score <= alpha:
+                move, score = self.alpha_beta_search(board, depth, -float('inf'), beta, self.color, start_time, time_limit)
+            elif not self._time_up and score >= beta:
+                move, score = self.alpha_beta_search(board, depth, alpha, float('inf'), self.color, start_time, time_limit)
+            if self._time_up:
+                # An interrupted search scored its unsearched nodes statically and may only hold a
+                # window bound, so its move is used only when no earlier iteration finished.
+                if best_move is None:
+                    best_move = move
+                break
             if move is not None:
                 best_move = move
+                prev_score = score
             depth += 1
 
         # Instead of falling back to a random move,
@@ -107,41 +213,232 @@ class ChessAgent:
             return fallback_move
 
     def alpha_beta_search(self, board: chess.Board, depth: int, alpha: float, beta: float,
-                          player: bool, start_time: float, time_limit: float):
-        # Check termination conditions.
-        if depth == 0 or board.is_game_over() or (time.time() - start_time) > time_limit:
+                          player: bool, start_time: float, time_limit: float, ply: int = 0):
+        # Out of time: return the static evaluation. Reading the clock at every node is
+        # comparatively expensive, so it is only checked every TIME_CHECK_INTERVAL nodes.
+        self._node_counter += 1
+        if self._node_counter & (TIME_CHECK_INTERVAL - 1) == 0 and (time.time() - start_time) > time_limit:
+            self._time_up = True
+        if self._time_up:
             return None, self.evaluate(board)
+
+        # --- Transposition Table Probe ---
+        # Reuse a stored score when it was searched at least as deep and its bound is usable here.
+        key = chess.polyglot.zobrist_hash(board)
+        tt_move = None
+        entry = self.tt.get(key)
+        if entry is not None:
+            tt_depth, tt_value, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == TT_EXACT:
+                    return tt_move, tt_value
+                elif tt_flag == TT_LOWER:
+                    alpha = max(alpha, tt_value)
+                elif tt_flag == TT_UPPER:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_move, tt_value
+
+        # Generate legal moves once per node; they are reused for the game-over check,
+        # the evaluation at the leaves and the move loop. Only mate and stalemate end the
+        # search here: insufficient material is scored by evaluate(), and repetition and
+        # move-count draws are too rare at these depths to be worth checking at every node.
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return None, self.evaluate(board, legal_moves=legal_moves, alpha=alpha, beta=beta)
+        # At the horizon, resolve pending captures before trusting the static evaluation.
+        if depth == 0:
+            return None, self._quiesce(board, alpha, beta, player, start_time, time_limit, legal_moves=legal_moves)
+        alpha_orig, beta_orig = alpha, beta
+
+        # --- Null-Move Pruning ---
+        # If the side to move can pass and a reduced search still fails outside the window, the
+        # position is good enough to prune. Skipped at the root, in check, right after another
+        # null move, when only pawns are left (zugzwang risk) and when the TT expects no cutoff.
+        # The bound being tested must be finite for a zero-size window around it to make sense.
+        maximizing = board.turn == player
+        in_check = board.is_check()
+        bound_is_finite = beta != float('inf') if maximizing else alpha != -float('inf')
+        tt_expects_fail = entry is not None and (
+            (maximizing and entry[2] == TT_UPPER and entry[1] < beta)
+            or (not maximizing and entry[2] == TT_LOWER and entry[1] > alpha))
+        if (depth >= 3 and ply > 0 and not in_check and board.move_stack and board.peek()
+                and bound_is_finite and not tt_expects_fail
+                and board.occupied_co[board.turn] & ~(board.pawns | board.kings)):
+            board.push(chess.Move.null())
+            if maximizing:
+                _, null_score = self.alpha_beta_search(board, depth - 1 - NULL_MOVE_REDUCTION, beta - NULL_WINDOW, beta,
+                                                       player, start_time, time_limit, ply + 1)
+            else:
+                _, null_score = self.alpha_beta_search(board, depth - 1 - NULL_MOVE_REDUCTION, alpha, alpha + NULL_WINDOW,
+                                                       player, start_time, time_limit, ply + 1)
+            board.pop()
+            if maximizing and null_score >= beta:
+                return None, beta
+            if not maximizing and null_score <= alpha:
+                return None, alpha
+
+        # --- Late Move Reductions ---
+        # Quiet moves late in the ordering rarely raise the score. They are first searched at
+        # reduced depth with a zero-size window on the bound of the side to move, and only
+        # searched again at full depth when that reduced search beats the bound.
+        killers = self.killers[ply] if ply < MAX_PLY else [None, None]
+
+        def is_late_quiet_move(move, moves_searched):
+            return (moves_searched >= LMR_MIN_MOVES and depth >= 3 and not in_check
+                    and not board.is_capture(move) and not move.promotion and move not in killers)
+
         best_move = None
-        if board.turn == player:
+        if maximizing:
             value = -float('inf')
-            for move in board.legal_moves:
+            for moves_searched, move in enumerate(self._order_moves(board, legal_moves, ply, tt_move)):
+                reduce = is_late_quiet_move(move, moves_searched)
                 board.push(move)
-                _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
-                                                  player, start_time, time_limit)
+                if reduce and not board.is_check():
+                    _, score = self.alpha_beta_search(board, depth - 1 - LMR_REDUCTION, alpha, alpha + NULL_WINDOW,
+                                                      player, start_time, time_limit, ply + 1)
+                    if score > alpha:
+                        _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
+                                                          player, start_time, time_limit, ply + 1)
+                else:
+                    _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
+                                                      player, start_time, time_limit, ply + 1)
                 board.pop()
                 if score > value:
                     value = score
                     best_move = move
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    self._store_killer(board, move, ply)
                     break  # Beta cutoff.
-            return best_move, value
         else:
             value = float('inf')
-            for move in board.legal_moves:
+            for moves_searched, move in enumerate(self._order_moves(board, legal_moves, ply, tt_move)):
+                reduce = is_late_quiet_move(move, moves_searched)
                 board.push(move)
-                _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
-                                                  player, start_time, time_limit)
+                if reduce and not board.is_check():
+                    _, score = self.alpha_beta_search(board, depth - 1 - LMR_REDUCTION, beta - NULL_WINDOW, beta,
+                                                      player, start_time, time_limit, ply + 1)
+                    if score < beta:
+                        _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
+                                                          player, start_time, time_limit, ply + 1)
+                else:
+                    _, score = self.alpha_beta_search(board, depth - 1, alpha, beta,
+                                                      player, start_time, time_limit, ply + 1)
                 board.pop()
                 if score < value:
                     value = score
                     best_move = move
                 beta = min(beta, value)
                 if alpha >= beta:
+                    self._store_killer(board, move, ply)
                     break  # Alpha cutoff.
-            return best_move, value
 
-    def evaluate(self, board: chess.Board, depth: int = 0) -> float:
+        # --- Transposition Table Store ---
+        # Results from a search cut short by the clock are incomplete, so they are not stored.
+        if not self._time_up:
+            if value <= alpha_orig:
+                flag = TT_UPPER
+            elif value >= beta_orig:
+                flag = TT_LOWER
+            else:
+                flag = TT_EXACT
+            if key not in self.tt and len(self.tt) >= TT_MAX_ENTRIES:
+                self.tt.popitem(last=False)  # FIFO eviction of the oldest entry.
+            self.tt[key] = (depth, value, flag, best_move)
+        return best_move, value
+
+    def _quiesce(self, board: chess.Board, alpha: float, beta: float, player: bool,
+                 start_time: float = 0.0, time_limit: float = float('inf'),
+                 qply: int = 0, legal_moves: list = None) -> float:
+        """
+        Quiescence search: only captures (and, on the first ply, checks) are expanded until the
+        position is quiet, so leaf scores are not taken in the middle of a tactical sequence.
+        The side to move may always "stand pat" on the static evaluation.
+        Quiescence nodes count towards the clock checks like the nodes of the main search.
+        """
+        self._node_counter += 1
+        if self._node_counter & (TIME_CHECK_INTERVAL - 1) == 0 and (time.time() - start_time) > time_limit:
+            self._time_up = True
+        if legal_moves is None:
+            legal_moves = list(board.legal_moves)
+        stand = self.evaluate(board, legal_moves=legal_moves, alpha=alpha, beta=beta)
+        if self._time_up or not legal_moves:
+            return stand
+
+        maximizing = board.turn == player
+        if maximizing:
+            if stand >= beta:
+                return beta
+            alpha = max(alpha, stand)
+        else:
+            if stand <= alpha:
+                return alpha
+            beta = min(beta, stand)
+
+        captures = [move for move in legal_moves if board.is_capture(move)]
+        captures.sort(key=lambda move: _mvv_lva(board, move), reverse=True)
+        if qply == 0:
+            captures += [move for move in legal_moves if not board.is_capture(move) and board.gives_check(move)]
+
+        for move in captures:
+            board.push(move)
+            score = self._quiesce(board, alpha, beta, player, start_time, time_limit, qply + 1)
+            board.pop()
+            if maximizing:
+                if score >= beta:
+                    return beta
+                alpha = max(alpha, score)
+            else:
+                if score <= alpha:
+                    return alpha
+                beta = min(beta, score)
+        return alpha if maximizing else beta
+
+    def _order_moves(self, board: chess.Board, legal_moves: list, ply: int, tt_move: chess.Move = None) -> list:
+        """
+        Orders legal moves as: transposition table move, captures by MVV-LVA
+        (most valuable victim, least valuable attacker), killer moves, then quiet moves.
+        """
+        killers = self.killers[ply] if ply < MAX_PLY else [None, None]
+
+        def order_key(move):
+            if move == tt_move:
+                return -1e9
+            if board.is_capture(move):
+                return -_mvv_lva(board, move) - 1000
+            if move in killers:
+                return -100
+            return 0
+
+        return sorted(legal_moves, key=order_key)
+
+    def _store_killer(self, board: chess.Board, move: chess.Move, ply: int):
+        """Remembers a quiet move that caused a cutoff, shifting out the older killer at this ply."""
+        if ply >= MAX_PLY or board.is_capture(move):
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    @staticmethod
+    def _king_escape_count(board: chess.Board, color: bool) -> int:
+        """
+        Counts the squares around the king of ``color`` that are neither occupied by its own pieces
+        nor attacked by the other side. The king is taken off the board when looking for attackers,
+        so a square behind it on a checking line counts as attacked.
+        """
+        king_sq = board.king(color)
+        occupied = board.occupied & ~chess.BB_SQUARES[king_sq]
+        escapes = 0
+        for square in chess.scan_forward(board.attacks_mask(king_sq) & ~board.occupied_co[color]):
+            if not board.attackers_mask(not color, square, occupied):
+                escapes += 1
+        return escapes
+
+    def evaluate(self, board: chess.Board, depth: int = 0, legal_moves: list = None,
+                 alpha: float = -float('inf'), beta: float = float('inf')) -> float:
         """
         Enhanced evaluation function that:
         - Returns extreme values for mate/stalemate.
@@ -156,163 +453,127 @@ class ChessAgent:
         - Multiple piece coordination,
         - Penalties for positions that do not show positional improvement,
         - And a penalty for disruptive captures when in a dominant position.
+        The legal moves of the side to move may be passed in to avoid regenerating them.
+        Given a search window [alpha, beta], the threat bonus is skipped once the score is
+        certain to fall outside of it; the returned score is then on the correct side of the window.
         """
+        if legal_moves is None:
+            legal_moves = list(board.legal_moves)
+
         # Terminal states.
-        if board.is_checkmate():
-            return 10000 - depth if board.turn != self.color else -10000 + depth
-        if board.is_stalemate() or board.is_insufficient_material():
+        if not legal_moves:
+            if board.is_check():
+                return 10000 - depth if board.turn != self.color else -10000 + depth
+            return 0  # Stalemate.
+        if board.is_insufficient_material():
             return 0
 
-        # Basic material values.
-        piece_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
+        piece_values = PIECE_VALUES
         score = 0
 
         # --- Material Count ---
-        for piece_type, value in piece_values.items():
-            score += len(board.pieces(piece_type, self.color)) * value
-            score -= len(board.pieces(piece_type, not self.color)) * value
+        material = _material_balance(board, self.color)
+        score += material
 
         # --- Passed Pawn Evaluation ---
-        def is_passed_pawn(square, color):
-            rank = chess.square_rank(square)
-            file = chess.square_file(square)
-            if color == chess.WHITE:
-                for r in range(rank+1, 8):
-                    for f in range(max(0, file-1), min(7, file+1)+1):
-                        sq = chess.square(f, r)
-                        piece = board.piece_at(sq)
-                        if piece is not None and piece.piece_type == chess.PAWN and piece.color != color:
-                            return False
-                return True
-            else:
-                for r in range(rank-1, -1, -1):
-                    for f in range(max(0, file-1), min(7, file+1)+1):
-                        sq = chess.square(f, r)
-                        piece = board.piece_at(sq)
-                        if piece is not None and piece.piece_type == chess.PAWN and piece.color != color:
-                            return False
-                return True
-
-        def open_road(square, color):
-            rank = chess.square_rank(square)
-            file = chess.square_file(square)
-            if color == chess.WHITE:
-                for r in range(rank+1, 8):
-                    sq = chess.square(file, r)
-                    if board.piece_at(sq) is not None:
-                        return False
-                return True
-            else:
-                for r in range(rank-1, -1, -1):
-                    sq = chess.square(file, r)
-                    if board.piece_at(sq) is not None:
-                        return False
-                return True
-
-        # Reward our advanced passed pawns.
-        for pawn in board.pieces(chess.PAWN, self.color):
-            rank = chess.square_rank(pawn)
-            if is_passed_pawn(pawn, self.color):
-                bonus = (rank * 0.5) if self.color == chess.WHITE else ((7 - rank) * 0.5)
-                if open_road(pawn, self.color):
-                    bonus += 2.0  # Extra bonus for a completely open road.
-                score += bonus
-
-        # Penalize enemy passed pawns.
-        for pawn in board.pieces(chess.PAWN, not self.color):
-            rank = chess.square_rank(pawn)
-            if is_passed_pawn(pawn, not self.color):
-                bonus = ((7 - rank) * 0.5) if self.color == chess.WHITE else (rank * 0.5)
-                if open_road(pawn, not self.color):
-                    bonus += 2.0
-                score -= bonus
-
-        # --- Threats and Counter-Threats Bonus ---
-        # For each of our pieces that is attacked, add a bonus if we also threaten a more valuable enemy piece.
-        counter_threat_bonus = 0
-        for square, piece in board.piece_map().items():
-            if piece.color == self.color:
-                if board.attackers(not self.color, square):
-                    threatened_value = piece_values[piece.piece_type]
-                    for enemy_sq, enemy_piece in board.piece_map().items():
-                        if enemy_piece.color != self.color and board.is_attacked_by(self.color, enemy_sq):
-                            enemy_value = piece_values[enemy_piece.piece_type]
-                            if enemy_value > threatened_value:
-                                counter_threat_bonus += (enemy_value - threatened_value) * 0.2
-        score += counter_threat_bonus
-
-        # --------------------------
-        # Advanced Piece Safety Evaluation
-        # --------------------------
-        # For every non-king piece, calculate a safety margin defined as:
-        #     (number of defenders) - (number of attackers)
-        # If the margin is negative, the piece is considered "hanging."
-        # We apply a penalty proportional to the imbalance and to the piece's material value.
+        # Reward our advanced passed pawns and penalize the enemy's. A pawn is passed when no enemy
+        # pawn stands in front of it on its own or an adjacent file, and its road is open when every
+        # square in front of it on its file is empty. Pawns are read straight off the bitboards.
+        occupied = board.occupied
+        for color, sign in ((self.color, 1), (not self.color, -1)):
+            pawns = board.pieces_mask(chess.PAWN, color)
+            enemy_pawns = board.pieces_mask(chess.PAWN, not color)
+            passed_masks = PASSED_PAWN_MASKS[color]
+            forward_masks = FORWARD_FILE_MASKS[color]
+            while pawns:
+                square = (pawns & -pawns).bit_length() - 1
+                pawns &= pawns - 1
+                if not passed_masks[square] & enemy_pawns:
+                    rank = square >> 3
+                    bonus = (rank * 0.5) if color == chess.WHITE else ((7 - rank) * 0.5)
+                    if not forward_masks[square] & occupied:
+                        bonus += 2.0  # Extra bonus for a completely open road.
+                    score += sign * bonus
+
+        # --- Attack Maps ---
+        # One walk over each side's pieces yields the mobility proxy (squares each piece attacks
+        # that are not occupied by its own side), the union of attacked squares, and, for every
+        # occupied square, how many of that side's pieces attack it.
+        def attack_summary(b, color):
+            own = b.occupied_co[color]
+            moves_count = 0
+            attacks_bb = 0
+            counts = [0] * 64
+            for square in chess.scan_forward(own):
+                mask = b.attacks_mask(square)
+                moves_count += chess.popcount(mask & ~own)
+                attacks_bb |= mask
+                hits = mask & occupied
+                while hits:
+                    target = (hits & -hits).bit_length() - 1
+                    counts[target] += 1
+                    hits &= hits - 1
+            return moves_count, attacks_bb, counts
+
+        attack_counts = [None, None]  # Indexed by color.
+        my_mobility, my_attacks_bb, attack_counts[self.color] = attack_summary(board, self.color)
+        opp_mobility, opp_attacks_bb, attack_counts[not self.color] = attack_summary(board, not self.color)
+
+        # --- Single Pass Over the Pieces ---
+        # Threats, piece safety, underdefended targets and coordination all depend on how many
+        # pieces of each side attack a square, so the piece map is walked once and the attacker
+        # counts are read from the attack maps.
         safety_factor = 0.5  # Adjust to tune the penalty severity.
         extra_hanging_penalty = 0.5  # Additional penalty if attacked by 2+ enemy pieces with no defense.
-        for color in [self.color, not self.color]:
-            # For our pieces, a negative margin lowers our score; for opponent's pieces it raises ours.
-            sign = 1 if color == self.color else -1
-            for piece_type in [chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]:
-                for square in board.pieces(piece_type, color):
-                    attackers = board.attackers(not color, square)
-                    defenders = board.attackers(color, square)
-                    safety_margin = len(defenders) - len(attackers)
-                    if safety_margin < 0:
-                        # The penalty increases with both the material value and the deficit.
-                        penalty = abs(safety_margin) * piece_values[piece_type] * safety_factor
-                        score -= sign * penalty
-                    # If a piece is attacked by two or more enemy pieces and has no defenders,
-                    # apply an extra penalty.
-                    if len(attackers) >= 2 and len(defenders) == 0:
-                        extra_penalty = piece_values[piece_type] * extra_hanging_penalty
-                        score -= sign * extra_penalty
-
-        # --- Reward Opportunities to Capture Underdefended Opponent Pieces ---
-        for piece_type, value in piece_values.items():
-            if piece_type == chess.KING:
+        threatened_values = []  # Values of our pieces under attack.
+        targeted_values = []  # Values of enemy pieces we attack.
+        coordination_bonus = 0
+        for square, piece in board.piece_map().items():
+            value = piece_values[piece.piece_type]
+            attackers = attack_counts[not piece.color][square]
+            defenders = attack_counts[piece.color][square]
+            is_ours = piece.color == self.color
+
+            if is_ours:
+                if attackers:
+                    threatened_values.append(value)
+                # Piece Coordination: reward positions where our pieces support one another.
+                if defenders > 1:
+                    coordination_bonus += (defenders - 1) * 0.2
+            elif attackers:
+                targeted_values.append(value)
+
+            if piece.piece_type == chess.KING:
                 continue
-            for square in board.pieces(piece_type, not self.color):
-                attackers = board.attackers(self.color, square)
-                defenders = board.attackers(not self.color, square)
-                if len(attackers) > len(defenders):
-                    score += value * 0.3
 
-        # --- Mobility Bonus ---
-        def mobility(b, color):
-            original_turn = b.turn
-            b.turn = color
-            moves_count = len(list(b.legal_moves))
-            b.turn = original_turn
-            return moves_count
+            # Advanced Piece Safety: the safety margin is (number of defenders) - (number of attackers).
+            # If the margin is negative, the piece is considered "hanging" and we apply a penalty
+            # proportional to the imbalance and to the piece's material value.
+            # For our pieces, a negative margin lowers our score; for opponent's pieces it raises ours.
+            sign = 1 if is_ours else -1
+            safety_margin = defenders - attackers
+            if safety_margin < 0:
+                score -= sign * abs(safety_margin) * value * safety_factor
+            # If a piece is attacked by two or more enemy pieces and has no defenders,
+            # apply an extra penalty.
+            if attackers >= 2 and defenders == 0:
+                score -= sign * value * extra_hanging_penalty
+
+            # Reward opportunities to capture underdefended opponent pieces.
+            if not is_ours and attackers > defenders:
+                score += value * 0.3
 
+        # --- Mobility Bonus ---
         mobility_factor = 0.05
-        score += mobility_factor * (mobility(board, self.color) - mobility(board, not self.color))
+        score += mobility_factor * (my_mobility - opp_mobility)
 
         # --- Central Control Bonus ---
-        central_squares = [chess.D4, chess.D5, chess.E4, chess.E5]
         central_control_bonus = 0.2
-        for square in central_squares:
-            if board.is_attacked_by(self.color, square):
-                score += central_control_bonus
-            if board.is_attacked_by(not self.color, square):
-                score -= central_control_bonus
+        central_metric = central_control_bonus * (chess.popcount(my_attacks_bb & CENTRAL_BB)
+                                                  - chess.popcount(opp_attacks_bb & CENTRAL_BB))
+        score += central_metric
 
         # --- Piece Coordination Bonus ---
-        # Reward positions where our pieces support one another.
-        coordination_bonus = 0
-        for square, piece in board.piece_map().items():
-            if piece.color == self.color:
-                defenders = board.attackers(self.color, square)
-                if len(defenders) > 1:
-                    coordination_bonus += (len(defenders) - 1) * 0.2
         score += coordination_bonus
 
         # --- Discourage Non-Positive Captures ---
@@ -320,24 +581,12 @@ class ChessAgent:
         if board.move_stack:
             last_move = board.peek()
             if board.turn != self.color and board.is_capture(last_move):
-                material_diff = 0
-                for piece_type, value in piece_values.items():
-                    material_diff += len(board.pieces(piece_type, self.color)) * value
-                    material_diff -= len(board.pieces(piece_type, not self.color)) * value
-                if material_diff < 1:  # No net material gain
+                if material < 1:  # No net material gain
                     score -= 1.0
 
         # --- Positional Improvement Check ---
         # Combine non-material factors: mobility, central control, and coordination.
-        my_mobility = mobility(board, self.color)
-        opp_mobility = mobility(board, not self.color)
         pos_metric = mobility_factor * (my_mobility - opp_mobility)
-        central_metric = 0
-        for square in central_squares:
-            if board.is_attacked_by(self.color, square):
-                central_metric += central_control_bonus
-            if board.is_attacked_by(not self.color, square):
-                central_metric -= central_control_bonus
         pos_metric += central_metric
         pos_metric += coordination_bonus
         # Penalize positions that do not show a measurable improvement.
@@ -353,11 +602,35 @@ class ChessAgent:
                 if board.is_capture(last_move):
                     score -= 2.0
 
+        # --- Lazy Evaluation Cutoff ---
+        # Only the counter-threat bonus and the forced mate heuristic are left. The bonus lies
+        # between 0 and 0.2 * (number of our threatened pieces) * (value of all targeted enemy
+        # pieces), so once the score is outside the window by that much it cannot come back in.
+        # The forced mate heuristic is unbounded, so no early exit is taken when it applies.
+        enemy_occupied = board.occupied_co[not self.color]
+        enemy_king_only = chess.popcount(enemy_occupied) == 1
+        if not enemy_king_only:
+            if score >= beta:
+                return score
+            counter_threat_cap = 0.2 * len(threatened_values) * sum(targeted_values)
+            if score + counter_threat_cap <= alpha:
+                return score + counter_threat_cap
+
+        # --- Threats and Counter-Threats Bonus ---
+        # For each of our pieces that is attacked, add a bonus if we also threaten a more valuable enemy piece.
+        counter_threat_bonus = 0
+        for threatened_value in threatened_values:
+            for enemy_value in targeted_values:
+                if enemy_value > threatened_value:
+                    counter_threat_bonus += (enemy_value - threatened_value) * 0.2
+        score += counter_threat_bonus
+
         # --- Forced Mate Heuristic ---
-        # Reward positions that confine the enemy king.
-        if len(board.pieces(chess.KING, not self.color)) == 1:
+        # Reward positions that confine the enemy king once the opponent has only the king left.
+        # The king's mobility is the number of squares around it that we do not attack.
+        if enemy_king_only:
             enemy_king_sq = board.king(not self.color)
-            enemy_king_moves = sum(1 for move in board.legal_moves if move.from_square == enemy_king_sq)
+            enemy_king_moves = self._king_escape_count(board, not self.color)
             mate_bonus = (10 - enemy_king_moves) * 50  # Fewer moves = higher bonus.
             score += mate_bonus
 
@@ -1,6 +1,11 @@
 import pandas as pd
 import chess
+import chess.polyglot
+import random
 import re
+from collections import defaultdict
+
+_WS_RE = re.compile(r'\s+')
 
 class MoveBook:
     """
@@ -12,6 +17,8 @@ class MoveBook:
     moves_white: DataFrame containing move sequences from white's perspective
     moves_black: DataFrame containing move sequences from black's perspective
     openings: Dictionary of chess openings converted from ECO codes
+    games: Per color, every Magnus game as a list of validated chess.Move objects
+    responses: Per color, a dictionary mapping Polyglot Zobrist keys of positions to the moves Magnus played from them
 
     Methods
     ----------
@@ -21,8 +28,10 @@ class MoveBook:
         Converts ECO openings DataFrame into a structured dictionary
     get_opening_moves()
         Retrieves opening moves for a given ECO code and player color
-    get_magnus_moves()
-        Returns moves from a randomly chosen Magnus Carlsen game based on player color
+    _parse_games()
+        Parses Magnus' games once into validated move lists
+    _index_positions()
+        Indexes the moves played from each position of the parsed games
     get_response_to_position()
         Attempts to find a move that responds to the current board position
 
@@ -31,35 +40,25 @@ class MoveBook:
         self.moves_white = moves_white
         self.moves_black = moves_black
         self.openings = self._convert_ecocodes_to_dict(openings)
+        self.games = {
+            chess.WHITE: self._parse_games(moves_white),
+            chess.BLACK: self._parse_games(moves_black),
+        }
+        self.responses = {color: self._index_positions(games, color) for color, games in self.games.items()}
 
     def _convert_ecocodes_to_dict(self, df_ecocodes):
         """
         Converts the ECO openings DataFrame into a dictionary keyed by ECO code.
         Each value is a dict with keys 'white' and 'black' holding the respective moves.
         """
-        openings_dict = {}
-        for _, row in df_ecocodes.iterrows():
-            eco_code = row["eco"]  # Use the ECO code as the key.
-            move_sequence = row["eco_example"]
-
-            # Split the string into tokens using whitespace.
-            tokens = re.split(r'\s+', move_sequence.strip())
-            moves = []
-            for token in tokens:
-                # Remove common trailing punctuation (like commas or periods).
-                token = token.strip(".,")
-                # Skip tokens that are just move numbers or extraneous words.
-                if token.isdigit():
-                    continue
-                if token.lower() in ["etc", "etc."]:
-                    continue
-                moves.append(token)
-
-            # Assume moves are alternating: White's moves at even indices and Black's at odd.
-            white_moves = moves[::2]
-            black_moves = moves[1::2]
-            openings_dict[eco_code] = {"white": white_moves, "black": black_moves}
-        return openings_dict
+        # Split every example into tokens at once with vectorized string operations.
+        tokens = df_ecocodes["eco_example"].str.strip().str.split(_WS_RE)
+        # Remove common trailing punctuation (like commas or periods) and skip tokens that
+        # are just move numbers or extraneous words.
+        moves = tokens.map(lambda toks: [t for t in (tok.strip(".,") for tok in toks)
+                                         if not t.isdigit() and t.lower() not in ("etc", "etc.")])
+        # Assume moves are alternating: White's moves at even indices and Black's at odd.
+        return dict(zip(df_ecocodes["eco"], moves.map(lambda m: {"white": m[::2], "black": m[1::2]})))
 
     def get_opening_moves(self, opening_code: str, color: bool = chess.WHITE) -> list:
         """
@@ -69,67 +68,56 @@ class MoveBook:
         opening = self.openings.get(opening_code, {})
         return opening.get("white", []) if color == chess.WHITE else opening.get("black", [])
 
-    def get_magnus_moves(self, color: bool) -> list:
+    @staticmethod
+    def _split_move_sequence(move_sequence: str) -> list:
+        """Splits a stored move sequence ('|' or whitespace separated) into SAN tokens."""
+        if '|' in move_sequence:
+            return move_sequence.split('|')
+        return move_sequence.split()
+
+    def _parse_games(self, moves_df: pd.DataFrame) -> list:
+        """
+        Parses every game's SAN sequence once into a list of chess.Move objects.
+        A game is truncated at its first unparseable move.
         """
-        Returns a list of moves (in SAN notation) for a randomly chosen game
-        from Magnus Carlsen’s games. For white, it takes even–indexed moves;
-        for black, odd–indexed moves.
+        games = []
+        for move_sequence in moves_df['move_sequence']:
+            board = chess.Board()
+            moves = []
+            for move_san in self._split_move_sequence(move_sequence):
+                try:
+                    move = board.parse_san(move_san)
+                except ValueError:
+                    break
+                board.push(move)
+                moves.append(move)
+            games.append(moves)
+        return games
 
-        Returns an empty list if there's an error parsing the move sequence.
+    def _index_positions(self, games: list, color: bool) -> dict:
+        """
+        Maps each position of the parsed games where `color` is to move to the moves played
+        from it, keyed by the position's Polyglot Zobrist hash like an opening book. Moves
+        played in several games appear several times, weighting the random choice.
+        The replay only pushes already validated moves.
         """
-        try: # Added "try" for error handling.
-            if color == chess.WHITE:
-                chosen_row = self.moves_white.sample(n=1).iloc[0]
-            else:
-                chosen_row = self.moves_black.sample(n=1).iloc[0]
-            move_sequence = chosen_row['move_sequence']
-            if '|' in move_sequence:
-                full_moves = move_sequence.split('|')
-            else:
-                full_moves = move_sequence.split()
-            return full_moves[0::2] if color == chess.WHITE else full_moves[1::2]
-        except Exception as e: # Added exception for error handling.
-            print(f"Error processing Magnus game: {e}")
-            return []  # Return empty list on error
+        responses = defaultdict(list)
+        for moves in games:
+            board = chess.Board()
+            for move in moves:
+                if board.turn == color:
+                    responses[chess.polyglot.zobrist_hash(board)].append(move)
+                board.push(move)
+        return dict(responses)
 
-def get_response_to_position(self, board: chess.Board, color: bool) -> chess.Move: #Added to attempt to fix errors
+    def get_response_to_position(self, board: chess.Board, color: bool) -> chess.Move: #Added to attempt to fix errors
         """
-        New method: Try to find a move from the database that responds to the current position.
-        This is a fallback when direct move sequence doesn't work.
+        Try to find a move from the database that responds to the current position.
+        Positions are looked up by Zobrist hash in the index built from all of Magnus' games
+        at load time, so a move is found even when the game reached the position by transposition.
         """
-        try:
-            # Sample multiple games to increase chances of finding a matching position
-            sample_size = min(20, len(self.moves_white if color == chess.WHITE else self.moves_black))
-            sample_rows = (self.moves_white if color == chess.WHITE else self.moves_black).sample(n=sample_size)
-            
-            # Try each game in the sample
-            for _, row in sample_rows.iterrows():
-                move_sequence = row['move_sequence']
-                if '|' in move_sequence:
-                    full_moves = move_sequence.split('|')
-                else:
-                    full_moves = move_sequence.split()
-                
-                # Set up a test board to find positions that match our current board
-                test_board = chess.Board()
-                for i, move_san in enumerate(full_moves):
-                    try:
-                        move = test_board.parse_san(move_san)
-                        test_board.push(move)
-                        
-                        # If we find a matching position and it's our turn
-                        if test_board.board_fen() == board.board_fen() and test_board.turn == color:
-                            # Get the next move from this sequence if available
-                            if i + 1 < len(full_moves):
-                                next_move_san = full_moves[i + 1]
-                                move = board.parse_san(next_move_san)
-                                if move in board.legal_moves:
-                                    return move
-                    except Exception:
-                        # Skip errors and continue trying moves
-                        break
-            
+        candidates = [move for move in self.responses[color].get(chess.polyglot.zobrist_hash(board), [])
+                      if board.is_legal(move)]
+        if not candidates:
             return None  # No matching position found
-        except Exception as e:
-            print(f"Error in get_response_to_position: {e}")
-            return None  # Return None on error
\ No newline at end of file
+        return random.choice(candidates)
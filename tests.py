@@ -1,24 +1,106 @@
 import unittest
 import chess
+import chess.polyglot
+import functools
+import time
+import random
 import pandas as pd
 from main import MoveBook, ChessAgent, Match
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, DEFAULT
+
+# Fixtures are built lazily, once per process, so importing the module builds nothing and each test
+# class only builds what it uses. Boards are copied into each test instead of being set up from scratch.
+@functools.lru_cache(maxsize=1)
+def _starting_board():
+    return chess.Board()
+
+
+@functools.lru_cache(maxsize=1)
+def _scholar_board():
+    return chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR b KQkq - 0 1")
+
+
+class _FakeDF:
+    """
+    Lightweight stand-in for the Magnus games DataFrames. It only provides what MoveBook uses:
+    the 'move_sequence' column.
+    """
+    def __init__(self, move_sequence):
+        self.move_sequence = list(move_sequence)
+
+    def __getitem__(self, column):
+        return getattr(self, column)
+
+
+class _StubAgent:
+    """Agent stand-in for Match tests: returns a fixed move and counts how often it was asked."""
+    def __init__(self, ret):
+        self._ret = ret
+        self.calls = 0
+
+    def select_move(self, board, time_limit=None):
+        self.calls += 1
+        return self._ret
+
+
+class _StubMoveBook:
+    """MoveBook stand-in for ChessAgent tests: fixed opening moves and position response."""
+    def __init__(self, opening_moves, response=None):
+        self.opening_moves = opening_moves
+        self.response = response
+        self.response_calls = []
+
+    def get_opening_moves(self, code, color):
+        return self.opening_moves
+
+    def get_response_to_position(self, board, color):
+        self.response_calls.append((board, color))
+        return self.response
+
+
+def _record_searches(agent):
+    """
+    Wraps agent.alpha_beta_search so that every call, including the recursive ones, is recorded as
+    (last move, depth, alpha, beta, ply, score) in the returned list.
+    """
+    calls = []
+    search = agent.alpha_beta_search
+
+    def recording_search(board, depth, alpha, beta, player, start_time, time_limit, ply=0):
+        last_move = board.peek() if board.move_stack else None
+        move, score = search(board, depth, alpha, beta, player, start_time, time_limit, ply)
+        calls.append((last_move, depth, alpha, beta, ply, score))
+        return move, score
+
+    agent.alpha_beta_search = recording_search
+    return calls
+
+
+@functools.lru_cache(maxsize=1)
+def _test_games():
+    """Minimal test data, shared by every test; the tests only read it."""
+    moves_white = _FakeDF(['e4 e5 Nf3 Nc6 Bb5', 'd4 d5 c4 e6 Nc3'])
+    moves_black = _FakeDF(['e4 c5 Nf3 d6 d4', 'e4 e6 d4 d5 Nc3'])
+    # The ECO conversion uses pandas string operations, so the openings stay a real DataFrame.
+    openings = pd.DataFrame({
+        'eco': ['A01', 'B20'],
+        'name': ['Nimzovich-Larsen Attack', 'Sicilian Defense'],
+        'eco_example': ['1. b3 e5 2. Bb2', '1. e4 c5']
+    })
+    return moves_white, moves_black, openings
+
+
+@functools.lru_cache(maxsize=1)
+def _build_movebook():
+    """Build the shared MoveBook once per process. Tests that need to mutate it should deep-copy it."""
+    return MoveBook(*_test_games())
+
 
 class TestMoveBook(unittest.TestCase):
-    def setUp(self):
-        # Create minimal test data
-        self.test_moves_white = pd.DataFrame({
-            'move_sequence': ['e4 e5 Nf3 Nc6 Bb5', 'd4 d5 c4 e6 Nc3']
-        })
-        self.test_moves_black = pd.DataFrame({
-            'move_sequence': ['e4 c5 Nf3 d6 d4', 'e4 e6 d4 d5 Nc3']
-        })
-        self.test_openings = pd.DataFrame({
-            'eco': ['A01', 'B20'],
-            'name': ['Nimzovich-Larsen Attack', 'Sicilian Defense'],
-            'eco_example': ['1. b3 e5 2. Bb2', '1. e4 c5']
-        })
-        self.move_book = MoveBook(self.test_moves_white, self.test_moves_black, self.test_openings)
+    @classmethod
+    def setUpClass(cls):
+        cls.test_moves_white, cls.test_moves_black, cls.test_openings = _test_games()
+        cls.move_book = _build_movebook()
 
     def test_convert_ecocodes_to_dict(self):
         """Test that ECO codes are correctly converted to a dictionary structure"""
@@ -42,51 +124,50 @@ class TestMoveBook(unittest.TestCase):
         moves = self.move_book.get_opening_moves('Z99', chess.WHITE)
         self.assertEqual(moves, [])
         
-    def test_get_magnus_moves(self):
-        """Test retrieving moves from Magnus database"""
-        with patch.object(self.test_moves_white, 'sample') as mock_sample:
-            mock_sample.return_value = pd.DataFrame({'move_sequence': ['e4 e5 Nf3 Nc6 Bb5']})
-            white_moves = self.move_book.get_magnus_moves(chess.WHITE)
-            self.assertEqual(white_moves, ['e4', 'Nf3', 'Bb5'])
-            
-        with patch.object(self.test_moves_black, 'sample') as mock_sample:
-            mock_sample.return_value = pd.DataFrame({'move_sequence': ['e4 c5 Nf3 d6 d4']})
-            black_moves = self.move_book.get_magnus_moves(chess.BLACK)
-            self.assertEqual(black_moves, ['c5', 'd6'])
-    
+    def test_index_positions(self):
+        """Test that the moves Magnus played are indexed by the position they were played from"""
+        start_key = chess.polyglot.zobrist_hash(_starting_board())
+        self.assertEqual(self.move_book.responses[chess.WHITE][start_key],
+                         [chess.Move.from_uci("e2e4"), chess.Move.from_uci("d2d4")])
+        # Black's games are only indexed at positions where black is to move.
+        self.assertNotIn(start_key, self.move_book.responses[chess.BLACK])
+        self.assertEqual(self.move_book.games[chess.BLACK][0][:2],
+                         [chess.Move.from_uci("e2e4"), chess.Move.from_uci("c7c5")])
+
     def test_get_response_to_position(self):
         """Test finding a response to a specific board position"""
-        board = chess.Board()
-        board.push_san("e4")
-        board.push_san("c5")
+        board = _starting_board().copy(stack=False)
+        board.push(chess.Move.from_uci("e2e4"))
+        board.push(chess.Move.from_uci("c7c5"))
         
-        with patch.object(self.test_moves_white, 'sample') as mock_sample:
-            mock_df = pd.DataFrame({'move_sequence': ['e4 c5 Nf3']})
-            mock_sample.return_value = mock_df
-            move = self.move_book.get_response_to_position(board, chess.WHITE)
-            self.assertIsNotNone(move)
-            self.assertEqual(board.san(move), "Nf3")
+        move_book = MoveBook(_FakeDF(['e4 c5 Nf3']), self.test_moves_black, self.test_openings)
+        move = move_book.get_response_to_position(board, chess.WHITE)
+        self.assertIsNotNone(move)
+        self.assertEqual(move.uci(), "g1f3")
+
+        # Positions that never occurred in the games have no response.
+        board = _starting_board().copy(stack=False)
+        board.push(chess.Move.from_uci("h2h3"))
+        self.assertIsNone(move_book.get_response_to_position(board, chess.BLACK))
 
 
 class TestChessAgent(unittest.TestCase):
     def setUp(self):
-        # Create mock move book
-        self.mock_move_book = MagicMock()
-        self.mock_move_book.get_opening_moves.return_value = ['e4', 'Nf3']
-        self.mock_move_book.get_magnus_moves.return_value = ['d4', 'c4']
-        self.white_agent = ChessAgent(chess.WHITE, self.mock_move_book, test_opening_code="A01")
-        self.black_agent = ChessAgent(chess.BLACK, self.mock_move_book)
+        # Built per test: tests advance the agents' counters and reconfigure the mock book.
+        # Create stub move book
+        self.stub_move_book = _StubMoveBook(['e4', 'Nf3'])
+        self.white_agent = ChessAgent(chess.WHITE, self.stub_move_book, test_opening_code="A01")
+        self.black_agent = ChessAgent(chess.BLACK, self.stub_move_book)
     
     def test_initialization(self):
         """Test that agent initializes with correct attributes"""
         self.assertEqual(self.white_agent.color, chess.WHITE)
         self.assertEqual(self.white_agent.test_opening_moves, ['e4', 'Nf3'])
-        self.assertEqual(self.white_agent.magnus_moves, ['d4', 'c4'])
         self.assertEqual(self.white_agent.opening_moves_played, 0)
         
     def test_is_move_legal(self):
         """Test move legality checker"""
-        board = chess.Board()
+        board = _starting_board().copy(stack=False)
         # Legal move
         move = self.white_agent.is_move_legal(board, "e4")
         self.assertIsNotNone(move)
@@ -96,34 +177,38 @@ class TestChessAgent(unittest.TestCase):
         # Invalid notation
         move = self.white_agent.is_move_legal(board, "invalid")
         self.assertIsNone(move)
+        # Null move notation
+        move = self.white_agent.is_move_legal(board, "--")
+        self.assertIsNone(move)
     
     def test_select_move_opening_book(self):
         """Test that agent uses opening book moves when available"""
-        board = chess.Board()
+        board = _starting_board().copy(stack=False)
         with patch.object(self.white_agent, 'alpha_beta_search') as mock_search:
             # Should not be called when opening book is used
             mock_search.return_value = (None, 0)
             move = self.white_agent.select_move(board)
-            self.assertEqual(board.san(move), "e4")
+            self.assertEqual(move.uci(), "e2e4")
             self.assertEqual(self.white_agent.opening_moves_played, 1)
             mock_search.assert_not_called()
     
     def test_select_move_magnus(self):
         """Test that black agent uses Magnus moves"""
-        board = chess.Board()
-        board.push_san("e4")  # white's move
+        board = _starting_board().copy(stack=False)
+        board.push(chess.Move.from_uci("e2e4"))  # white's move
+        self.stub_move_book.response = chess.Move.from_uci("c7c5")
         with patch.object(self.black_agent, 'alpha_beta_search') as mock_search:
             mock_search.return_value = (None, 0)
             move = self.black_agent.select_move(board)
-            self.assertEqual(board.san(move), "d4")
-            self.assertEqual(self.black_agent.magnus_moves_played, 1)
+            self.assertEqual(move.uci(), "c7c5")
+            self.assertEqual(self.stub_move_book.response_calls, [(board, chess.BLACK)])
+            mock_search.assert_not_called()
     
     def test_select_move_alpha_beta(self):
         """Test that agent falls back to alpha-beta search when no book moves available"""
-        board = chess.Board()
-        white_agent = ChessAgent(chess.WHITE, self.mock_move_book)
+        board = _starting_board().copy(stack=False)
+        white_agent = ChessAgent(chess.WHITE, self.stub_move_book)
         white_agent.opening_moves_played = 999  # Force no opening moves
-        white_agent.magnus_moves_played = 999   # Force no Magnus moves
         
         with patch.object(white_agent, 'alpha_beta_search') as mock_search:
             test_move = chess.Move.from_uci("e2e4")
@@ -132,63 +217,272 @@ class TestChessAgent(unittest.TestCase):
             self.assertEqual(move, test_move)
             mock_search.assert_called()
     
+    def test_aspiration_windows(self):
+        """Test that depth 3 on searches a window around the previous score and re-searches a failing side"""
+        board = _starting_board().copy(stack=False)
+        white_agent = ChessAgent(chess.WHITE, self.stub_move_book)
+        move = chess.Move.from_uci("e2e4")
+        inf = float('inf')
+        # Scripted root scores: depth 3 fails low, depth 4 fails high, depth 5 runs out of time.
+        # Windows are the previous score +/- ASPIRATION_WINDOW (0.5).
+        scores = {(1, -inf, inf): 1.0, (2, -inf, inf): 1.0,
+                  (3, 0.5, 1.5): 0.5, (3, -inf, 1.5): 0.2,
+                  (4, -0.3, 0.7): 0.7, (4, -0.3, inf): 2.0}
+
+        def search(board, depth, alpha, beta, *args):
+            if depth > 4:
+                white_agent._time_up = True
+                return None, 0.0
+            return move, scores[(depth, alpha, beta)]
+
+        white_agent.alpha_beta_search = search
+        searches = _record_searches(white_agent)
+        self.assertEqual(white_agent.select_move(board), move)
+        self.assertEqual([call[1:4] for call in searches],
+                         [(1, -inf, inf), (2, -inf, inf),
+                          (3, 0.5, 1.5), (3, -inf, 1.5),
+                          (4, -0.3, 0.7), (4, -0.3, inf),
+                          (5, 1.5, 2.5)])
+
+    def test_select_move_time_up(self):
+        """Test that a search interrupted by the clock does not replace the last completed iteration's move"""
+        board = _starting_board().copy(stack=False)
+        white_agent = ChessAgent(chess.WHITE, self.stub_move_book)
+        completed_move = chess.Move.from_uci("e2e4")
+
+        def search(board, depth, *args):
+            # Depth 1 completes; the clock runs out during depth 2.
+            if depth > 1:
+                white_agent._time_up = True
+                return chess.Move.from_uci("a2a3"), 5.0
+            return completed_move, 0.3
+
+        with patch.object(white_agent, 'alpha_beta_search', side_effect=search) as mock_search:
+            move = white_agent.select_move(board)
+            self.assertEqual(move, completed_move)
+            self.assertEqual(mock_search.call_count, 2)
+
+    def test_select_move_time_limit(self):
+        """Test that select_move returns close to its time limit on a tactical position"""
+        board = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")  # Kiwipete
+        white_agent = ChessAgent(chess.WHITE, self.stub_move_book)
+        start = time.time()
+        move = white_agent.select_move(board, time_limit=0.5)
+        self.assertIn(move, board.legal_moves)
+        self.assertLess(time.time() - start, 0.75)
+
+    def test_transposition_table(self):
+        """Test that alpha-beta search stores the root position in the transposition table"""
+        board = _starting_board().copy(stack=False)
+        move, score = self.white_agent.alpha_beta_search(board, 2, -float('inf'), float('inf'),
+                                                         chess.WHITE, time.time(), 60.0)
+        entry = self.white_agent.tt[chess.polyglot.zobrist_hash(board)]
+        self.assertEqual(entry[0], 2)
+        self.assertEqual(entry[1], score)
+        self.assertEqual(entry[3], move)
+
+    def test_transposition_table_eviction(self):
+        """Test that a full transposition table evicts its oldest entries first"""
+        board = _starting_board().copy(stack=False)
+        with patch(f'{ChessAgent.__module__}.TT_MAX_ENTRIES', 4):
+            self.white_agent.alpha_beta_search(board, 2, -float('inf'), float('inf'), chess.WHITE, time.time(), 60.0)
+        self.assertEqual(len(self.white_agent.tt), 4)
+        # The root is stored last, so it survives the eviction.
+        self.assertEqual(next(reversed(self.white_agent.tt)), chess.polyglot.zobrist_hash(board))
+
+    def test_order_moves(self):
+        """Test that the TT move comes first, followed by captures in MVV-LVA order"""
+        board = chess.Board("4k3/8/8/3q4/4P3/8/8/3QK2R w - - 0 1")
+        tt_move = chess.Move.from_uci("h1h8")
+        moves = self.white_agent._order_moves(board, list(board.legal_moves), 0, tt_move)
+        self.assertEqual(moves[0], tt_move)
+        self.assertEqual(moves[1], chess.Move.from_uci("e4d5"))  # Pawn takes queen
+        self.assertEqual(moves[2], chess.Move.from_uci("d1d5"))  # Queen takes queen
+
+    def test_null_move_pruning(self):
+        """Test that a failing-high (or, at minimizing nodes, failing-low) null-move search prunes the node"""
+        null = chess.Move.null()
+        # White to move and a queen up: the reduced null search beats beta, so the node returns beta.
+        board = chess.Board("4k3/4p3/8/8/8/8/4P3/3QK3 b - - 0 1")
+        board.push(chess.Move.from_uci("e8d8"))
+        searches = _record_searches(self.white_agent)
+        result = self.white_agent.alpha_beta_search(board, 3, -1.0, 0.0, chess.WHITE, time.time(), 60.0, 1)
+        self.assertEqual(result, (None, 0.0))
+        self.assertEqual([call[:5] for call in searches if call[4] == 2], [(null, 0, -0.01, 0.0, 2)])
+
+        # Black to move and a queen up: the null search tests alpha instead, and fails low.
+        board = chess.Board("3qk3/4p3/8/8/8/8/4P3/4K3 w - - 0 1")
+        board.push(chess.Move.from_uci("e1d1"))
+        searches = _record_searches(self.white_agent)
+        result = self.white_agent.alpha_beta_search(board, 3, 0.0, 1.0, chess.WHITE, time.time(), 60.0, 1)
+        self.assertEqual(result, (None, 0.0))
+        self.assertEqual([call[:5] for call in searches if call[4] == 2], [(null, 0, 0.0, 0.01, 2)])
+
+    def test_null_move_pruning_skipped(self):
+        """Test that no null move is tried with only pawns left, in check, or right after a null move"""
+        positions = [
+            ("4k3/4p3/8/8/8/8/4P3/4K3 b - - 0 1", chess.Move.from_uci("e8d8")),   # Only pawns.
+            ("4k2r/4p3/8/8/8/8/4P3/3QK3 b - - 0 1", chess.Move.from_uci("h8h1")),  # In check.
+            ("4k3/4p3/8/8/8/8/4P3/3QK3 b - - 0 1", chess.Move.null()),            # After a null move.
+        ]
+        for fen, last_move in positions:
+            board = chess.Board(fen)
+            board.push(last_move)
+            agent = ChessAgent(chess.WHITE, self.stub_move_book)
+            searches = _record_searches(agent)
+            agent.alpha_beta_search(board, 3, -1.0, 0.0, chess.WHITE, time.time(), 60.0, 1)
+            self.assertTrue(searches)
+            self.assertFalse([call for call in searches if call[4] == 2 and call[0] == chess.Move.null()], fen)
+
+    def test_late_move_reductions(self):
+        """Test that reduced moves beating alpha are searched again in full, and special moves are never reduced"""
+        board = chess.Board("4k3/1P6/8/8/8/8/3n4/R3K3 w - - 0 1")
+        killer = chess.Move.from_uci("a1a2")
+        self.white_agent.killers[0] = [killer, None]
+
+        def is_special(move):
+            return board.is_capture(move) or move.promotion or board.gives_check(move) or move == killer
+
+        def static_score(move):
+            board.push(move)
+            score = self.white_agent.evaluate(board)
+            board.pop()
+            return score
+
+        # Root moves are ordered quiet moves first, weakest first, so late quiet moves keep improving on alpha;
+        # captures (Kxd2), promotions (b8), checks (Ra8+) and the killer (Ra2) come last.
+        root_order = sorted(board.legal_moves, key=lambda move: (is_special(move), static_score(move)))
+        specials = [move for move in root_order if is_special(move)]
+        self.white_agent._order_moves = lambda b, moves, ply, tt_move=None: root_order if ply == 0 else moves
+        searches = _record_searches(self.white_agent)
+        self.white_agent.alpha_beta_search(board, 3, -50.0, float('inf'), chess.WHITE, time.time(), 60.0)
+        root_children = [call for call in searches if call[4] == 1]
+
+        reduced = [i for i, call in enumerate(root_children) if call[1] == 1]
+        self.assertTrue(reduced)
+        researched = 0
+        for i in reduced:
+            move, _, alpha, beta, _, score = root_children[i]
+            self.assertEqual(beta, alpha + 0.01)
+            if score > alpha:
+                self.assertEqual(root_children[i + 1][:4], (move, 2, alpha, float('inf')))
+                researched += 1
+        self.assertGreater(researched, 0)
+        for move, depth, *_ in root_children:
+            if move in specials:
+                self.assertEqual(depth, 2, board.san(move))
+
+    def test_quiesce(self):
+        """Test that quiescence search resolves a queen hanging to a pawn that the static evaluation misjudges"""
+        # White to move can take the black queen with the e4 pawn.
+        board = chess.Board("4k3/p7/8/3q4/4P3/8/P7/4K3 w - - 0 1")
+        self.assertLess(self.white_agent.evaluate(board), 0)
+        self.assertGreater(self.white_agent._quiesce(board, -float('inf'), float('inf'), chess.WHITE), 0)
+        # Black to move can take the white queen with the c6 pawn.
+        board = chess.Board("4k3/8/2p5/3Q4/8/8/8/4K3 b - - 0 1")
+        self.assertGreater(self.white_agent.evaluate(board), 0)
+        self.assertLess(self.white_agent._quiesce(board, -float('inf'), float('inf'), chess.WHITE), 0)
+
+    def test_evaluate_forced_mate_heuristic(self):
+        """Test that the king confinement bonus only applies when the opponent has a lone king"""
+        board = chess.Board("7k/8/6K1/8/8/8/8/3Q4 b - - 0 1")
+        self.assertGreater(self.white_agent.evaluate(board), 100)
+        board = _starting_board().copy(stack=False)
+        self.assertLess(self.white_agent.evaluate(board), 100)
+
+    def test_king_escape_count(self):
+        """Test that squares behind the king on a checking line are not counted as escapes"""
+        for fen in ["R3k3/8/4K3/8/8/8/8/8 b - - 0 1", "R3k3/8/3K4/8/8/8/8/8 b - - 0 1", "7k/8/6K1/8/8/8/8/3Q4 b - - 0 1"]:
+            board = chess.Board(fen)
+            self.assertEqual(ChessAgent._king_escape_count(board, chess.BLACK), board.legal_moves.count(), fen)
+
+    def test_evaluate_lazy_cutoff(self):
+        """Test that a windowed evaluation falls on the same side of the window as the full evaluation"""
+        rng = random.Random(3)
+        for _ in range(40):
+            board = _starting_board().copy(stack=False)
+            for _ in range(rng.randint(0, 80)):
+                moves = list(board.legal_moves)
+                if not moves:
+                    break
+                board.push(rng.choice(moves))
+            full = self.white_agent.evaluate(board)
+            for low, high in [(-3.0, -0.5), (-1.0, -0.01), (-0.05, 0.05), (0.01, 1.0), (0.5, 3.0)]:
+                alpha, beta = full + low, full + high
+                score = self.white_agent.evaluate(board, alpha=alpha, beta=beta)
+                self.assertEqual(score <= alpha, full <= alpha, board.fen())
+                self.assertEqual(score >= beta, full >= beta, board.fen())
+
     def test_evaluate(self):
         """Test the evaluation function"""
-        board = chess.Board()
+        board = _starting_board().copy(stack=False)
         # Default starting position should be roughly equal
         score = self.white_agent.evaluate(board)
         self.assertAlmostEqual(score, 0.0, delta=1.0)
         
         # After e4, white should have a small advantage
-        board.push_san("e4")
+        board.push(chess.Move.from_uci("e2e4"))
         score = self.white_agent.evaluate(board)
         self.assertGreater(score, 0)
         
         # Test checkmate evaluation
-        board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR b KQkq - 0 1")  # Scholar's mate
-        board.push_san("Qf6")
-        board.push_san("Qxf7#")
+        board = _scholar_board().copy(stack=False)  # Scholar's mate
+        board.push(chess.Move.from_uci("f8c5"))
+        board.push(chess.Move.from_uci("f3f7"))  # Qxf7#
         score = self.white_agent.evaluate(board)
         self.assertGreater(score, 9000)  # Should be close to 10000 (checkmate value)
 
 
 class TestMatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Patch the clock once for the whole class; setUp resets the mocks between tests.
+        cls._time_patchers = [patch('time.sleep'), patch('time.time')]
+        cls._mock_sleep, cls._mock_time = [patcher.start() for patcher in cls._time_patchers]
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in reversed(cls._time_patchers):
+            patcher.stop()
+
     def setUp(self):
-        self.mock_white_agent = MagicMock()
-        self.mock_black_agent = MagicMock()
-        self.match = Match(self.mock_white_agent, self.mock_black_agent)
+        self.mock_sleep = self._mock_sleep
+        self.mock_time = self._mock_time
+        self.mock_sleep.reset_mock()
+        self.mock_time.reset_mock(side_effect=True)
+        # Built per test: playing a move mutates the match's board and clocks.
+        self.stub_white_agent = _StubAgent(chess.Move.from_uci("e2e4"))
+        self.stub_black_agent = _StubAgent(chess.Move.from_uci("e7e5"))
+        self.match = Match(self.stub_white_agent, self.stub_black_agent)
     
     def test_initialization(self):
         """Test match initialization"""
-        self.assertEqual(self.match.white_agent, self.mock_white_agent)
-        self.assertEqual(self.match.black_agent, self.mock_black_agent)
+        self.assertEqual(self.match.white_agent, self.stub_white_agent)
+        self.assertEqual(self.match.black_agent, self.stub_black_agent)
         self.assertEqual(self.match.white_clock, 10.0)
         self.assertEqual(self.match.black_clock, 10.0)
         self.assertTrue(isinstance(self.match.board, chess.Board))
     
-    @patch('time.sleep')  # Patch sleep to speed up tests
-    @patch('time.time')
-    def test_play_one_move(self, mock_time, mock_sleep):
+    def test_play_one_move(self):
         """Test playing a single move"""
-        mock_time.side_effect = [0, 1]  # Simulate 1 second elapsed
-        self.mock_white_agent.select_move.return_value = chess.Move.from_uci("e2e4")
+        self.mock_time.side_effect = [0, 1]  # Simulate 1 second elapsed
         
         with patch.object(self.match, 'render') as mock_render:  # Don't actually render
             with patch.object(self.match.board, 'is_game_over', side_effect=[False, True]):  # End after one move
                 result = self.match.play()
-                self.mock_white_agent.select_move.assert_called_once()
+                self.assertEqual(self.stub_white_agent.calls, 1)
                 self.assertEqual(self.match.white_clock, 9.1)  # 10 - 1 + 0.1 increment
                 mock_render.assert_called_once()
 
     def test_render(self):
         """Test render function (mocked)"""
-        with patch('IPython.display.clear_output') as mock_clear:
-            with patch('IPython.display.display') as mock_display:
-                with patch('chess.svg.board') as mock_svg:
-                    self.match.render()
-                    mock_clear.assert_called_once()
-                    mock_display.assert_called_once()
-                    mock_svg.assert_called_once()
+        # The IPython display helpers are imported by name, so they are patched where Match looks them up.
+        with patch.multiple(Match.__module__, clear_output=DEFAULT, display=DEFAULT, SVG=DEFAULT) as mock_display, \
+                patch('chess.svg.board') as mock_svg:
+            self.match.render()
+            mock_display['clear_output'].assert_called_once()
+            mock_display['display'].assert_called_once_with(mock_display['SVG'].return_value)
+            mock_svg.assert_called_once()
 
 
 if __name__ == '__main__':